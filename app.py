@@ -1,6 +1,33 @@
+import glob
+import hashlib
+import os
+import types
 import streamlit as st
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
+
+def lazy_njit(**options):
+    # Lazy JIT: numba imports and compiles on the first call; lazy_njit functions may call each other
+    def wrap(fn):
+        def jit():
+            if call.compiled is None:
+                try:
+                    from numba import njit
+                except ImportError: # Numba optional
+                    call.compiled = fn
+                else:
+                    deps = {n: g.jit() for n in fn.__code__.co_names if hasattr(g := fn.__globals__.get(n), 'jit')}
+                    call.compiled = njit(**options)(types.FunctionType(fn.__code__, {**fn.__globals__, **deps}, fn.__name__))
+            return call.compiled
+        def call(*args):
+            return (call.compiled or jit())(*args)
+        call.compiled = None
+        call.jit = jit
+        return call
+    return wrap
 
 # ==========================================
 # 1. SETUP & DESIGN
@@ -12,96 +39,265 @@ st.title("🍽️ XYZ Pricing Simulator")
 st.markdown("### Operational Planning Engine")
 
 # ==========================================
-# 2. ROBUST DATA LOADER
+# 2. PLATINUM LOGIC ENGINE
 # ==========================================
-@st.cache_data
-def load_data():
+# Strategy Table
+STRATEGY_TABLE = np.array([
+    ("⛔ BLOCK HIKE", "Refund Tax Applied (${refund_tax:.2f}). Quality Issue.", "red"),
+    ("📉 LIQUIDATE", "Zombie Stock (>180 days). Flush cash.", "#d63031"), # Red
+    ("🛡️ DEFENSE (CUT ADS)", "Actual ACOS ({actual_acos:.1f}%) > Break-Even ({be_acos:.1f}%). Cut spend.", "#e17055"), # Orange
+    ("📈 PROFIT RECOVERY", "Unit Economics negative. Must raise price.", "#fdcb6e"), # Yellow
+    ("⚔️ OFFENSE (SCALE)", "High Efficiency & Low Price. Boost Ads + Hike Price.", "#00b894"), # Green
+    ("🚀 CATCH UP", "Significant gap to competitor.", "#0984e3"), # Blue
+    ("MAINTAIN", "Metrics stable.", "gray"),
+], dtype=[('name', 'U32'), ('reason', 'U96'), ('color', 'U8')])
+
+# fastmath minus nnan/ninf (Return_Rate can be inf)
+@lazy_njit(cache=True, fastmath={'nsz', 'arcp', 'contract', 'afn', 'reassoc'})
+def _engine_core(p_cost, p_price, p_comp, p_inv, p_ret, p_spend, p_adsales, p_units, p_min_margin):
+    
+    # 1. Advanced Unit Economics
+    cpa = p_spend / p_units if p_units > 0 else 0.0
+    actual_acos = (p_spend / p_adsales * 100) if p_adsales > 0 else 0.0
+    
+    # Refund Tax Calculation
+    refund_tax = 0.0
+    if p_ret > 8.1:
+        refund_tax = (p_ret / 100) * p_price
+        
+    total_cost = p_cost + cpa + refund_tax
+    net_profit = p_price - total_cost
+    
+    # Break-Even ACOS
+    margin_dollar = p_price - (p_cost + refund_tax)
+    be_acos = (margin_dollar / p_price) * 100 if p_price > 0 else 0.0
+    
+    # 2. Logic Gates
+    rec_price = p_price
+    code = 6 # MAINTAIN
+
+    # A. HARD BLOCK (Quality)
+    if p_ret > 8.1:
+        code = 0
+
+    # B. LIQUIDATION (Zombie Stock)
+    elif p_inv > 180:
+        rec_price = max(p_cost * 1.05, p_comp * 0.95)
+        code = 1
+
+    # C. DEFENSE (Ad Bleed)
+    elif actual_acos > be_acos:
+        rec_price = p_price # Don't move price yet
+        code = 2
+
+    # D. PROFIT RECOVERY
+    elif net_profit < 0:
+        rec_price = total_cost / (1 - (p_min_margin/100))
+        code = 3
+
+    # E. OFFENSE (Growth)
+    elif (actual_acos < be_acos * 0.8) and (p_inv < 90) and (p_price < p_comp):
+        rec_price = min(p_comp, p_price * 1.05)
+        code = 4
+
+    # F. CATCH UP
+    elif p_price < p_comp * 0.9:
+        rec_price = p_comp * 0.95
+        code = 5
+
+    return rec_price, code, net_profit, be_acos, actual_acos, refund_tax, cpa
+
+def run_platinum_engine(p_cost, p_price, p_comp, p_inv, p_ret, p_spend, p_adsales, p_units, p_min_margin):
+    rec_price, code, net_profit, be_acos, actual_acos, refund_tax, cpa = _engine_core(
+        float(p_cost), float(p_price), float(p_comp), float(p_inv), float(p_ret),
+        float(p_spend), float(p_adsales), float(p_units), float(p_min_margin)
+    )
+    strategy, reason, bg_color = STRATEGY_TABLE[code].item()
+    reason = reason.format(refund_tax=refund_tax, actual_acos=actual_acos, be_acos=be_acos)
+    return rec_price, strategy, reason, bg_color, net_profit, be_acos, actual_acos, refund_tax, cpa
+
+@lazy_njit(cache=True)
+def _engine_catalog(cost, price, comp, inv, ret, spend, adsales, units, min_margin):
+    # Catalog loop over _engine_core
+    n = len(cost)
+    codes = np.empty(n, dtype=np.uint8)
+    out = np.empty((6, n))
+    for i in range(n):
+        rec_price, code, net_profit, be_acos, actual_acos, refund_tax, cpa = _engine_core(
+            cost[i], price[i], comp[i], inv[i], ret[i], spend[i], adsales[i], units[i], min_margin[i]
+        )
+        codes[i] = code
+        out[0, i], out[1, i], out[2, i], out[3, i], out[4, i], out[5, i] = rec_price, net_profit, be_acos, actual_acos, refund_tax, cpa
+    return out, codes
+
+def run_platinum_engine_vec(df):
+    # Catalog-wide engine
+    *inputs, min_margin = (df[c].to_numpy(dtype=np.float64) for c in NUM_COLS)
+    out, codes = _engine_catalog(*inputs, min_margin * 100)
+    return pd.DataFrame(dict(zip(RESULT_COLS, out), Strategy_Code=codes), index=df.index)
+
+def precomputed_result(df, sku):
+    # Precomputed engine result
+    code = int(df.at[sku, 'Strategy_Code'])
+    rec_price, net_profit, be_acos, actual_acos, refund_tax, cpa = df.loc[sku, RESULT_COLS].to_numpy(dtype=np.float64).tolist()
+    strategy, reason, bg_color = STRATEGY_TABLE[code].item()
+    reason = reason.format(refund_tax=refund_tax, actual_acos=actual_acos, be_acos=be_acos)
+    return rec_price, strategy, reason, bg_color, net_profit, be_acos, actual_acos, refund_tax, cpa
+
+# ==========================================
+# 3. ROBUST DATA LOADER
+# ==========================================
+CSV_FILES = ['Pricing_Data.csv', 'Competitor_Data.csv', 'Returns_Data.csv', 'Inventory_Health.csv', 'Historical_Sales.csv', 'Ads_Performance.csv']
+CACHE_DIR = 'cache'
+CACHE_VERSION = 6 # bump on build_master changes
+RESULT_COLS = ['Rec_Price', 'Net_Profit', 'BE_ACOS', 'Actual_ACOS', 'Refund_Tax', 'Cpa']
+JOINED_COLS = ['Avg_Competitor_Price', 'Days_of_Supply', 'Units Ordered', 'Returns_Qty', 'Ad_Spend', 'Ad_Sales']
+# Engine inputs
+NUM_COLS = ['True_Unit_Cost', 'Current_Price', 'Avg_Competitor_Price', 'Days_of_Supply', 'Return_Rate', 'Ad_Spend', 'Ad_Sales', 'Units Ordered', 'Min_Margin']
+
+# Cleaning pattern
+_NUMBER_RE = r'[\$,%\s]'
+_NUMERIC_TEXT_RE = r'^[-+]?(\d+\.?\d*|\.\d+)$'
+_SKU_DICT = pa.dictionary(pa.int32(), pa.string())
+_NULL_VALUES = pacsv.ConvertOptions().null_values + ['-']
+
+def master_cache_path():
+    # Dataset cache, keyed by the source CSVs
+    stats = [CACHE_VERSION]
     try:
-        df_pricing = pd.read_csv('Pricing_Data.csv')
-        df_competitor = pd.read_csv('Competitor_Data.csv')
-        df_returns = pd.read_csv('Returns_Data.csv')
-        df_inventory = pd.read_csv('Inventory_Health.csv')
-        df_sales = pd.read_csv('Historical_Sales.csv')
-        df_ads = pd.read_csv('Ads_Performance.csv')
-    except:
+        for f in CSV_FILES:
+            st_f = os.stat(f)
+            stats.append((f, st_f.st_mtime_ns, st_f.st_size))
+    except OSError:
+        return None
+    sig = hashlib.sha1(repr(stats).encode()).hexdigest()[:12]
+    return os.path.join(CACHE_DIR, f'df_master_{sig}.parquet')
+
+def build_master(cache_path=None):
+    # Preflight
+    if not all(os.path.isfile(f) for f in CSV_FILES):
         st.error("❌ Files not found. Ensure CSVs are in the root folder.")
         return pd.DataFrame()
 
-    # --- CLEANING FUNCTIONS ---
-    def clean_currency(x):
-        if isinstance(x, str): return float(x.replace('$', '').replace(',', '').strip())
-        return float(x) if isinstance(x, (int, float)) else 0.0
-
-    def clean_percent(x):
-        if isinstance(x, str): return float(x.replace('%', '').strip())
-        return float(x) if isinstance(x, (int, float)) else 0.0
+    # Reading
+    def read(f, types, all_columns=False):
+        return pacsv.read_csv(f, read_options=pacsv.ReadOptions(use_threads=True, block_size=1 << 20),
+                              convert_options=pacsv.ConvertOptions(include_columns=[] if all_columns else list(types), column_types=types,
+                                                                   null_values=_NULL_VALUES, strings_can_be_null=True))
+    pricing = read('Pricing_Data.csv', {'SKU': pa.string(), 'True_Unit_Cost': pa.string(), 'Current_Price': pa.string(), 'Minimum_Acceptable_Margin_%': pa.string()})
+    competitor = read('Competitor_Data.csv', {'SKU': pa.string(), 'Avg_Competitor_Price': pa.string()})
+    returns = read('Returns_Data.csv', {'SKU': pa.string()}, all_columns=True) # 90-day column is found by name
+    inventory = read('Inventory_Health.csv', {'SKU': pa.string(), 'days-of-supply': pa.string()})
+    sales = read('Historical_Sales.csv', {'SKU': _SKU_DICT, 'Units Ordered': pa.string()})
+    ads = read('Ads_Performance.csv', {'SKU': _SKU_DICT, 'spend': pa.string(), 'sales1d': pa.string()})
 
-    def clean_numeric(x):
-        if isinstance(x, str): return float(str(x).replace(',', '').strip())
-        return float(x) if isinstance(x, (int, float)) else 0.0
+    # --- CLEANING FUNCTIONS ---
+    def to_number(arr): # non-numeric text -> 0
+        if pa.types.is_string(arr.type):
+            try:
+                return pc.fill_null(pc.cast(arr, pa.float64()), 0.0)
+            except pa.ArrowInvalid:
+                arr = pc.if_else(pc.match_substring_regex(arr, _NUMERIC_TEXT_RE), arr, None)
+        return pc.fill_null(pc.cast(arr, pa.float64()), 0.0)
+
+    def clean_number(arr):
+        if pa.types.is_string(arr.type):
+            arr = pc.replace_substring_regex(arr, _NUMBER_RE, '')
+        return to_number(arr)
+
+    def to_frame(tbl, **cols):
+        df = pa.table({'SKU': tbl['SKU'], **cols}).to_pandas(types_mapper=pd.ArrowDtype).set_index('SKU')
+        return df[~df.index.duplicated()] # first row per SKU
 
     # Apply Cleaning
-    df_pricing['True_Unit_Cost'] = df_pricing['True_Unit_Cost'].apply(clean_currency)
-    df_pricing['Current_Price'] = df_pricing['Current_Price'].apply(clean_currency)
-    df_pricing['Min_Margin'] = df_pricing['Minimum_Acceptable_Margin_%'].apply(clean_percent)
-    if df_pricing['Min_Margin'].mean() > 1: df_pricing['Min_Margin'] /= 100
+    min_margin = clean_number(pricing['Minimum_Acceptable_Margin_%'])
+    if (pc.mean(min_margin).as_py() or 0) > 1: min_margin = pc.divide(min_margin, 100)
+    df_pricing = to_frame(pricing,
+        True_Unit_Cost=clean_number(pricing['True_Unit_Cost']),
+        Current_Price=clean_number(pricing['Current_Price']),
+        **{'Minimum_Acceptable_Margin_%': pricing['Minimum_Acceptable_Margin_%']},
+        Min_Margin=min_margin,
+    )
     
-    df_competitor['Avg_Competitor_Price'] = df_competitor['Avg_Competitor_Price'].apply(clean_currency)
+    df_competitor = to_frame(competitor, Avg_Competitor_Price=clean_number(competitor['Avg_Competitor_Price']))
     
     # Returns
-    ret_col = [c for c in df_returns.columns if '90' in c][0]
-    df_returns['Returns_Qty'] = df_returns[ret_col].apply(clean_numeric)
+    ret_col = [c for c in returns.column_names if '90' in c][0]
+    df_returns = to_frame(returns, Returns_Qty=clean_number(returns[ret_col]))
     
     # Inventory
-    df_inventory['Days_of_Supply'] = df_inventory['days-of-supply'].apply(clean_numeric)
+    df_inventory = to_frame(inventory, Days_of_Supply=clean_number(inventory['days-of-supply']))
     
+    # --- AGGREGATION ---
+    def sum_by_sku(tbl, cols, names):
+        tbl = tbl.unify_dictionaries().group_by('SKU').aggregate([(c, 'sum') for c in cols])
+        tbl = pa.table([pc.cast(tbl['SKU'], pa.string())] + [tbl[f'{c}_sum'] for c in cols], names=['SKU'] + names)
+        return tbl.to_pandas(types_mapper=pd.ArrowDtype).set_index('SKU')
+
     # Sales Aggregation
-    df_sales['Units Ordered'] = pd.to_numeric(df_sales['Units Ordered'], errors='coerce').fillna(0)
-    sales_agg = df_sales.groupby('SKU')['Units Ordered'].sum().reset_index()
+    sales = pa.table({'SKU': sales['SKU'], 'Units Ordered': to_number(sales['Units Ordered'])})
+    sales_agg = sum_by_sku(sales, ['Units Ordered'], ['Units Ordered'])
 
     # Ads Aggregation
-    df_ads['spend'] = df_ads['spend'].apply(clean_currency)
-    df_ads['sales1d'] = df_ads['sales1d'].apply(clean_currency)
-    ads_agg = df_ads.groupby('SKU').agg({'spend': 'sum', 'sales1d': 'sum'}).reset_index().rename(columns={'spend': 'Ad_Spend', 'sales1d': 'Ad_Sales'})
+    ads = pa.table({'SKU': ads['SKU'], 'spend': clean_number(ads['spend']), 'sales1d': clean_number(ads['sales1d'])})
+    ads_agg = sum_by_sku(ads, ['spend', 'sales1d'], ['Ad_Spend', 'Ad_Sales'])
 
     # Merging
-    df = pd.merge(df_pricing, df_competitor[['SKU', 'Avg_Competitor_Price']], on='SKU', how='left')
-    df = pd.merge(df, df_inventory[['SKU', 'Days_of_Supply']], on='SKU', how='left')
-    df = pd.merge(df, sales_agg, on='SKU', how='left')
-    df = pd.merge(df, df_returns[['SKU', 'Returns_Qty']], on='SKU', how='left')
-    df = pd.merge(df, ads_agg, on='SKU', how='left')
+    df = df_pricing.join([df_competitor, df_inventory, sales_agg, df_returns, ads_agg], how='left').reset_index()
     
     # Derived Metrics
-    df['Return_Rate'] = (df['Returns_Qty'] / df['Units Ordered']) * 100
-    df['Return_Rate'] = df['Return_Rate'].fillna(0)
-    df.fillna(0, inplace=True)
-    
+    rate = (df['Returns_Qty'] / df['Units Ordered'] * 100).to_numpy(dtype=np.float64, na_value=np.nan)
+    df['Return_Rate'] = np.where(np.isnan(rate), 0.0, rate)
+
+    # Missing SKUs
+    df = df.fillna({c: 0 for c in JOINED_COLS})
+
+    # Persist cache
+    if cache_path:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            for stale in glob.glob(os.path.join(CACHE_DIR, 'df_master_*.parquet')):
+                os.remove(stale)
+            df.to_parquet(cache_path, engine='pyarrow', compression='zstd')
+        except OSError:
+            pass
+
     return df
 
+@st.cache_resource
+def load_data():
+    cache_path = master_cache_path()
+    if cache_path and os.path.exists(cache_path):
+        df = pd.read_parquet(cache_path, dtype_backend='pyarrow')
+    else:
+        df = build_master(cache_path)
+    if df.empty:
+        return df
+
+    # Default recommendations
+    df = df.join(run_platinum_engine_vec(df))
+
+    return df.set_index('SKU')
+
 df_master = load_data()
 
 # ==========================================
-# 3. SIDEBAR: SIMULATION INPUTS
+# 4. SIDEBAR: SIMULATION INPUTS
 # ==========================================
 st.sidebar.header("🔧 Simulation Controls")
 
 if not df_master.empty:
-    sku_list = df_master['SKU'].unique().tolist()
+    sku_list = df_master.index.tolist()
     selected_sku = st.sidebar.selectbox("Select SKU:", sku_list)
-    row = df_master[df_master['SKU'] == selected_sku].iloc[0]
     
     # Pre-fill Defaults
-    def_cost = float(row['True_Unit_Cost'])
-    def_price = float(row['Current_Price'])
-    def_comp = float(row['Avg_Competitor_Price'])
-    def_inv = float(row['Days_of_Supply'])
-    def_ret = float(row['Return_Rate'])
-    def_spend = float(row['Ad_Spend'])
-    def_adsales = float(row['Ad_Sales'])
-    def_units = float(row['Units Ordered'])
-    def_min_marg = float(row['Min_Margin']) * 100
+    vals = df_master.loc[selected_sku, NUM_COLS].to_numpy(dtype=np.float64).tolist()
+    def_cost, def_price, def_comp, def_inv, def_ret, def_spend, def_adsales, def_units, def_min_marg = vals
+    def_min_marg *= 100
+    defaults = (def_cost, def_price, def_comp, def_inv, def_ret, def_spend, def_adsales, def_units, def_min_marg)
 
 else:
+    selected_sku = defaults = None
     def_cost = 10.0; def_price=20.0; def_comp=22.0; def_inv=45.0; def_ret=2.0
     def_spend = 500.0; def_adsales=2000.0; def_units=100.0; def_min_marg=20.0
 
@@ -121,74 +317,6 @@ ad_spend = st.sidebar.number_input("Total Ad Spend ($)", value=def_spend)
 ad_sales = st.sidebar.number_input("Total Ad Sales ($)", value=def_adsales)
 total_units = st.sidebar.number_input("Total Units Sold", value=def_units)
 
-# ==========================================
-# 4. PLATINUM LOGIC ENGINE
-# ==========================================
-def run_platinum_engine(p_cost, p_price, p_comp, p_inv, p_ret, p_spend, p_adsales, p_units, p_min_margin):
-    
-    # 1. Advanced Unit Economics
-    cpa = p_spend / p_units if p_units > 0 else 0
-    actual_acos = (p_spend / p_adsales * 100) if p_adsales > 0 else 0
-    
-    # Refund Tax Calculation
-    refund_tax = 0
-    if p_ret > 8.1:
-        refund_tax = (p_ret / 100) * p_price
-        
-    total_cost = p_cost + cpa + refund_tax
-    net_profit = p_price - total_cost
-    
-    # Break-Even ACOS
-    margin_dollar = p_price - (p_cost + refund_tax)
-    be_acos = (margin_dollar / p_price) * 100 if p_price > 0 else 0
-    
-    # 2. Logic Gates
-    rec_price = p_price
-    strategy = "MAINTAIN"
-    reason = "Metrics stable."
-    bg_color = "gray"
-
-    # A. HARD BLOCK (Quality)
-    if p_ret > 8.1:
-        return p_price, "⛔ BLOCK HIKE", f"Refund Tax Applied (${refund_tax:.2f}). Quality Issue.", "red", net_profit, be_acos, actual_acos, refund_tax
-
-    # B. LIQUIDATION (Zombie Stock)
-    if p_inv > 180:
-        rec_price = max(p_cost * 1.05, p_comp * 0.95)
-        strategy = "📉 LIQUIDATE"
-        reason = "Zombie Stock (>180 days). Flush cash."
-        bg_color = "#d63031" # Red
-
-    # C. DEFENSE (Ad Bleed)
-    elif actual_acos > be_acos:
-        rec_price = p_price # Don't move price yet
-        strategy = "🛡️ DEFENSE (CUT ADS)"
-        reason = f"Actual ACOS ({actual_acos:.1f}%) > Break-Even ({be_acos:.1f}%). Cut spend."
-        bg_color = "#e17055" # Orange
-
-    # D. PROFIT RECOVERY
-    elif net_profit < 0:
-        rec_price = total_cost / (1 - (p_min_margin/100))
-        strategy = "📈 PROFIT RECOVERY"
-        reason = "Unit Economics negative. Must raise price."
-        bg_color = "#fdcb6e" # Yellow
-
-    # E. OFFENSE (Growth)
-    elif (actual_acos < be_acos * 0.8) and (p_inv < 90) and (p_price < p_comp):
-        rec_price = min(p_comp, p_price * 1.05)
-        strategy = "⚔️ OFFENSE (SCALE)"
-        reason = "High Efficiency & Low Price. Boost Ads + Hike Price."
-        bg_color = "#00b894" # Green
-
-    # F. CATCH UP
-    elif p_price < p_comp * 0.9:
-        rec_price = p_comp * 0.95
-        strategy = "🚀 CATCH UP"
-        reason = "Significant gap to competitor."
-        bg_color = "#0984e3" # Blue
-
-    return rec_price, strategy, reason, bg_color, net_profit, be_acos, actual_acos, refund_tax
-
 # ==========================================
 # 5. RUN SIMULATION & DISPLAY
 # ==========================================
@@ -196,58 +324,88 @@ def run_platinum_engine(p_cost, p_price, p_comp, p_inv, p_ret, p_spend, p_adsale
 # Add a separator line
 st.markdown("---")
 
-# MOVED BUTTON TO MAIN PAGE (Removed st.sidebar)
-if st.button("👉 Run Simulation", type="primary"):
+# Unit Economics chart spec
+UNIT_STACK_LABELS = pa.array(["1. COGS", "2. Refund Tax", "3. Ad CPA", "4. Net Profit"])
+UNIT_STACK_SPEC = {
+    "mark": {"type": "bar"},
+    "encoding": {
+        "x": {"field": "Component", "type": "ordinal", "title": "", "axis": {"grid": False}},
+        "y": {"field": "Value", "type": "quantitative", "title": "", "axis": {"grid": True}},
+        "tooltip": [{"field": "Component", "type": "nominal"}, {"field": "Value", "type": "quantitative"}],
+    },
+    "params": [{"name": "zoom", "select": {"type": "interval", "encodings": ["x", "y"]}, "bind": "scales"}],
+}
+
+@st.fragment
+def render_simulation(inputs):
+    cost, curr_price, comp_price, inv_days, ret_rate, ad_spend, ad_sales, total_units, min_margin = inputs
+
+    # MOVED BUTTON TO MAIN PAGE (Removed st.sidebar)
+    if st.button("👉 Run Simulation", type="primary"):
     
-    rec_price, strat, reason, color, profit, be_acos, act_acos, ref_tax = run_platinum_engine(
-        cost, curr_price, comp_price, inv_days, ret_rate, ad_spend, ad_sales, total_units, min_margin
-    )
+        last = st.session_state.get('last_rec')
+        if defaults is not None and inputs == defaults:
+            result = precomputed_result(df_master, selected_sku)
+        elif last is not None and last[0] == inputs:
+            result = last[1]
+        else:
+            result = run_platinum_engine(*inputs)
+            st.session_state['last_rec'] = (inputs, result)
+        rec_price, strat, reason, color, profit, be_acos, act_acos, ref_tax, cpa = result
     
-    # --- HEADER METRICS ---
-    c1, c2, c3 = st.columns(3)
-    c1.metric("Recommended Price", f"${rec_price:.2f}", delta=f"{rec_price - curr_price:.2f}")
-    c2.metric("Projected Unit Profit", f"${profit:.2f}", delta_color="normal")
-    c3.metric("Inventory Age", f"{int(inv_days)} Days", delta="CRITICAL" if inv_days > 180 else "OK", delta_color="inverse")
-
-    # --- STRATEGY BANNER ---
-    st.markdown(f"""
-    <div style="background-color: {color}; padding: 15px; border-radius: 10px; color: white; text-align: center; margin-bottom: 20px;">
-        <h2 style="margin:0;">{strat}</h2>
-        <p style="margin:0; font-size: 18px;">{reason}</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-    # --- DEEP DIVE COLUMNS ---
-    col_left, col_right = st.columns(2)
-
-    with col_left:
-        st.subheader("💰 Unit Economics Stack")
-        # Visualizing the stack
-        chart_data = pd.DataFrame({
-            "Component": ["1. COGS", "2. Refund Tax", "3. Ad CPA", "4. Net Profit"],
-            "Value": [cost, ref_tax, (ad_spend/total_units if total_units else 0), profit]
-        })
-        st.bar_chart(chart_data.set_index("Component"))
-        if ref_tax > 0:
-            st.error(f"⚠️ Refund Tax of ${ref_tax:.2f} applied due to high return rate (>8.1%)")
-
-    with col_right:
-        st.subheader("🎯 ACOS Gap Analysis")
+        # --- HEADER METRICS ---
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Recommended Price", f"${rec_price:.2f}", delta=f"{rec_price - curr_price:.2f}")
+        c2.metric("Projected Unit Profit", f"${profit:.2f}", delta_color="normal")
+        c3.metric("Inventory Age", f"{int(inv_days)} Days", delta="CRITICAL" if inv_days > 180 else "OK", delta_color="inverse")
+
+        # --- STRATEGY BANNER ---
+        st.markdown(f"""
+        <div style="background-color: {color}; padding: 15px; border-radius: 10px; color: white; text-align: center; margin-bottom: 20px;">
+            <h2 style="margin:0;">{strat}</h2>
+            <p style="margin:0; font-size: 18px;">{reason}</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+        # --- DEEP DIVE COLUMNS ---
+        col_left, col_right = st.columns(2)
+
+        with col_left:
+            st.subheader("💰 Unit Economics Stack")
+            # Visualizing the stack
+            st.vega_lite_chart(pa.table({"Component": UNIT_STACK_LABELS, "Value": [cost, ref_tax, cpa, profit]}),
+                               UNIT_STACK_SPEC, width="stretch")
+            if ref_tax > 0:
+                st.error(f"⚠️ Refund Tax of ${ref_tax:.2f} applied due to high return rate (>8.1%)")
+
+        with col_right:
+            st.subheader("🎯 ACOS Gap Analysis")
         
-        # Simple progress bar visualization for ACOS
-        st.write(f"**Actual ACOS: {act_acos:.1f}%**")
-        st.progress(min(act_acos/100, 1.0))
+            # Simple progress bar visualization for ACOS
+            st.write(f"**Actual ACOS: {act_acos:.1f}%**")
+            st.progress(min(act_acos/100, 1.0))
         
-        st.write(f"**Break-Even ACOS: {be_acos:.1f}%**")
-        st.progress(min(be_acos/100, 1.0))
+            st.write(f"**Break-Even ACOS: {be_acos:.1f}%**")
+            st.progress(min(be_acos/100, 1.0))
         
-        if act_acos > be_acos:
-            st.warning("📉 You are spending more on ads than your margin allows (Parasite Loss).")
-        else:
-            st.success("✅ Ad spend is profitable. Room to scale.")
+            if act_acos > be_acos:
+                st.warning("📉 You are spending more on ads than your margin allows (Parasite Loss).")
+            else:
+                st.success("✅ Ad spend is profitable. Room to scale.")
 
-else:
-    st.info("👈 Adjust parameters in the sidebar and click 'Run Simulation' above.")
+    else:
+        st.info("👈 Adjust parameters in the sidebar and click 'Run Simulation' above.")
+
+render_simulation((cost, curr_price, comp_price, inv_days, ret_rate, ad_spend, ad_sales, total_units, min_margin))
+
+# --- PORTFOLIO VIEW ---
+if not df_master.empty:
+    with st.expander("📋 Portfolio View (All SKUs)"):
+        portfolio = df_master[['Current_Price', 'Rec_Price', 'Net_Profit', 'Actual_ACOS', 'BE_ACOS', 'Refund_Tax']]
+        st.dataframe(
+            portfolio.assign(Strategy=STRATEGY_TABLE['name'][df_master['Strategy_Code'].to_numpy()]),
+            column_config={c: st.column_config.NumberColumn(format="%.2f") for c in portfolio.columns}
+        )
 
 # Footer
 st.markdown("---")